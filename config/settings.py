@@ -54,7 +54,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise, plus support for catalog snapshots written after startup
+    'products.middleware.SnapshotWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',  # <-- ADD THIS LINE
     'django.middleware.common.CommonMiddleware',
@@ -147,6 +148,14 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 # This enables WhiteNoise to compress and cache files for speed
 STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 
+# Catalog snapshots (gzipped NDJSON) are written here after every import and served by WhiteNoise
+CATALOG_SNAPSHOT_ROOT = os.path.join(STATIC_ROOT, 'catalog')
+
+# Cache any file with a 12 char content hash in its name forever
+# (covers both ManifestStaticFilesStorage output and catalog snapshots)
+WHITENOISE_IMMUTABLE_FILE_TEST = r'\.[0-9a-f]{12}\.'
+WHITENOISE_MIMETYPES = {'.ndjson': 'application/x-ndjson'}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
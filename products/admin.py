@@ -1,21 +1,35 @@
 import csv
 from io import StringIO
 from django.contrib import admin
-from django.db import connection, transaction
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Now
 from django.utils.html import format_html
+from .importing import sync_products
 from .models import Product, ProductImport
 
 # --- 1. Product Admin (View your products) ---
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ('name', 'vendor', 'vegan_status', 'category', 'price')
-    list_filter = ('vegan_status', 'vendor', 'category')
+    list_display = ('name', 'vendor', 'vegan_status', 'proposed_status', 'proposed_confidence', 'category', 'price')
+    list_filter = ('vegan_status', 'proposed_status', 'vendor', 'category')
     search_fields = ('name', 'description')
+    readonly_fields = ('proposed_status', 'proposed_confidence')
+    actions = ['accept_proposed_status']
+
+    @admin.action(description='Accept the proposed status for selected pending products')
+    def accept_proposed_status(self, request, queryset):
+        # update() skips auto_now, so bump updated_at for the delta sync API by hand.
+        # Decided products carry no proposal (same as classify.py)
+        updated = queryset.filter(vegan_status='PENDING', proposed_status__isnull=False).update(
+            vegan_status=F('proposed_status'), proposed_status=None, proposed_confidence=None, updated_at=Now(),
+        )
+        self.message_user(request, f'{updated} products updated.')
 
 # --- 2. Product Import Admin (The Upload Dashboard) ---
 @admin.register(ProductImport)
 class ProductImportAdmin(admin.ModelAdmin):
-    list_display = ('date_added', 'status_colored', 'log_message_short')
+    list_display = ('date_added', 'vendor', 'status_colored', 'log_message_short')
     readonly_fields = ('status', 'log_message', 'date_added')
     
     # Hide the "Add" button if we are viewing a list, but keep it available logic-wise
@@ -28,12 +42,16 @@ class ProductImportAdmin(admin.ModelAdmin):
         """
         # 1. Save the file record to the database first
         super().save_model(request, obj, form, change)
-        
-        # 2. Run the Import Logic
+
+        # 2. Run the import once the admin's own transaction has committed: sync_products runs its
+        #    own transactions, and new vendor partitions must not stay locked until the request ends
+        transaction.on_commit(lambda: self.run_import(obj))
+
+    def run_import(self, obj):
         try:
-            self.process_import(obj)
+            changed, deleted = self.process_import(obj)
             obj.status = 'SUCCESS'
-            obj.log_message = "Import completed successfully."
+            obj.log_message = f"Import completed successfully. {changed} products added or updated, {deleted} removed."
         except Exception as e:
             obj.status = 'FAILED'
             obj.log_message = f"Error: {str(e)}"
@@ -71,7 +89,8 @@ class ProductImportAdmin(admin.ModelAdmin):
                 p_link = row.get('Product_URL') or row.get('Product URL') or ''
                 p_name = row.get('clean_Product_Name') or row.get('Product Name') or ''
                 p_image = row.get('Product_Image') or row.get('Image') or ''
-                p_vendor = row.get('Vendor') or ''
+                # Vendor imports: every row belongs to the chosen vendor
+                p_vendor = import_obj.vendor or row.get('Vendor') or ''
                 p_cat = row.get('Product_SubCategory') or row.get('Category') or ''
                 
                 # 2. Clean Status (Yes/No -> VEGAN/NON_VEGAN)
@@ -97,22 +116,13 @@ class ProductImportAdmin(admin.ModelAdmin):
                 line = f"{clean(p_link)}\t{clean(p_name)}\t{clean(p_image)}\t{p_status}\t{clean(p_vendor)}\t{clean(p_cat)}\n"
                 data_buffer.write(line)
 
-        # --- C. DATABASE TRANSACTION (The Atomic Swap) ---
+        # --- C. DATABASE TRANSACTION (The Merge) ---
         data_buffer.seek(0) # Rewind buffer to start
         
-        with transaction.atomic():
-            cursor = connection.cursor()
-            
-            # 1. Wipe the table (Refresh Strategy)
-            cursor.execute("TRUNCATE TABLE products_product RESTART IDENTITY CASCADE;")
-            
-            # 2. Pour new data in
-            cursor.copy_from(
-                data_buffer,
-                'products_product',
-                columns=('product_link', 'name', 'image_url', 'vegan_status', 'vendor', 'category'),
-                null=''
-            )
+        # Upsert the new data and delete (with tombstones) anything missing from the CSV.
+        # Unchanged rows keep their updated_at, so delta sync clients only see real changes.
+        # With a vendor set, only that vendor's products are touched.
+        return sync_products(data_buffer, replace=True, vendor=import_obj.vendor or None)
 
     # --- UI Helpers ---
     def status_colored(self, obj):
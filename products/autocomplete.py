@@ -0,0 +1,166 @@
+import re
+import threading
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from heapq import nsmallest
+from .models import Product
+from .sync import changes, has_changes
+
+# How often (seconds) a request may check whether the catalog changed since the index was built
+VERSION_CHECK_INTERVAL = 30
+# Queries this short match huge ranges, so their top suggestions are precomputed at build time
+SHORT_PREFIX = 3
+MAX_LIMIT = 25
+# Upper bound on index entries looked at per (longer) query, keeps every lookup in the low ms.
+# A longer query matching more entries than this is ranked within the first MAX_SCAN of them
+# in alphabetical order, so a popular suggestion further down can be missed. By 4+ characters
+# runs that long are rare, which is why the shorter prefixes are precomputed instead.
+MAX_SCAN = 5000
+
+NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_text(text):
+    """'Crème Brûlée (Large)' -> 'creme brulee large'"""
+    text = unicodedata.normalize('NFKD', text or '').encode('ascii', 'ignore').decode('ascii')
+    return NON_ALNUM_RE.sub(' ', text.lower()).strip()
+
+
+class PrefixIndex:
+    """
+    Sorted-array prefix index. Every suggestion is indexed once per word start
+    ('onion pyaz' -> 'onion pyaz', 'pyaz'), so typing any word of a name finds it.
+    A lookup is a binary search plus a short forward scan.
+    """
+
+    def __init__(self, suggestions):
+        # suggestions: list of (text, type, count)
+        self.suggestions = suggestions
+        entries = []
+        for sid, (text, _, _) in enumerate(suggestions):
+            normalized = normalize_text(text)
+            for match in re.finditer(r'\S+', normalized):
+                entries.append((normalized[match.start():], sid, match.start() == 0))
+        entries.sort()
+        self.keys = [key for key, _, _ in entries]
+        self.ids = array('L', (sid for _, sid, _ in entries))
+        self.starts = array('b', (at_start for _, _, at_start in entries))
+
+        # Precompute the best MAX_LIMIT suggestions for every prefix of up to SHORT_PREFIX characters
+        # (keys are sorted, so each prefix is one contiguous run)
+        self.short = {}
+        for length in range(1, SHORT_PREFIX + 1):
+            i = 0
+            while i < len(self.keys):
+                # Keys shorter than the prefix ('g' from 'Amul Butter 500 g') can't start a run of this length
+                if len(self.keys[i]) < length:
+                    i += 1
+                    continue
+                prefix = self.keys[i][:length]
+                end = i
+                while end < len(self.keys) and self.keys[end].startswith(prefix):
+                    end += 1
+                self.short[prefix] = self._top(self._matches(prefix, i, end), MAX_LIMIT)
+                i = end
+
+    def _matches(self, query, i, end):
+        """
+        Best match quality per suggestion among keys[i:end]:
+        0 = exact, 1 = the whole name starts with the query, 2 = a later word does
+        """
+        best = {}
+        while i < end and self.keys[i].startswith(query):
+            sid = self.ids[i]
+            rank = 0 if self.keys[i] == query and self.starts[i] else (1 if self.starts[i] else 2)
+            if rank < best.get(sid, 3):
+                best[sid] = rank
+            i += 1
+        return best
+
+    def _top(self, best, limit):
+        # Rank: match quality, then popularity (number of products), then shorter text
+        def sort_key(sid):
+            text, _, count = self.suggestions[sid]
+            return (best[sid], -count, len(text), text)
+        return nsmallest(limit, best, key=sort_key)
+
+    def search(self, query, limit=10):
+        query = normalize_text(query)
+        if not query:
+            return []
+
+        if len(query) <= SHORT_PREFIX:
+            sids = self.short.get(query, [])[:limit]
+        else:
+            i = bisect_left(self.keys, query)
+            sids = self._top(self._matches(query, i, min(i + MAX_SCAN, len(self.keys))), limit)
+
+        return [
+            {'text': self.suggestions[sid][0], 'type': self.suggestions[sid][1], 'count': self.suggestions[sid][2]}
+            for sid in sids
+        ]
+
+
+def build_index():
+    """Builds a PrefixIndex over distinct product names, vendors and categories."""
+    counts = {}
+
+    def add(kind, text):
+        normalized = normalize_text(text)
+        if not normalized:
+            return
+        key = (kind, normalized)
+        if key in counts:
+            counts[key][1] += 1
+        else:
+            # The first spelling we see becomes the displayed text
+            counts[key] = [text.strip(), 1]
+
+    for name, vendor, category in Product.objects.values_list('name', 'vendor', 'category').iterator(chunk_size=5000):
+        add('product', name)
+        add('vendor', vendor)
+        add('category', category)
+
+    return PrefixIndex([(text, kind, count) for (kind, _), (text, count) in counts.items()])
+
+
+# --- Per-process cache, rebuilt lazily when the catalog version changes ---
+_lock = threading.Lock()
+_index = None
+_version = None
+_checked_at = float('-inf')
+
+
+def get_index():
+    """
+    Returns the index for the current catalog version. Whether anything changed since the index
+    was built (same sync tokens as the delta sync API, see sync.py) is checked at most every
+    VERSION_CHECK_INTERVAL seconds; while one thread rebuilds, the others keep answering from
+    the previous index.
+    """
+    global _index, _version, _checked_at
+
+    if _index is not None and time.monotonic() - _checked_at < VERSION_CHECK_INTERVAL:
+        return _index
+
+    if not _lock.acquire(blocking=_index is None):
+        return _index
+    try:
+        if _index is None or time.monotonic() - _checked_at >= VERSION_CHECK_INTERVAL:
+            if _index is None or has_changes(_version):
+                # Token first, so changes that land while we build trigger the next rebuild
+                version, _, _ = changes()
+                _index = build_index()
+                _version = version
+            _checked_at = time.monotonic()
+        return _index
+    finally:
+        _lock.release()
+
+
+def invalidate():
+    """Makes the next request re-check the catalog version (called after imports)."""
+    global _checked_at
+    _checked_at = float('-inf')
@@ -0,0 +1,192 @@
+from collections import deque
+from io import StringIO
+from django.db import connection, transaction
+from .autocomplete import normalize_text
+from .models import Product
+
+# --- Keyword dictionaries ---
+# phrase -> weight (how sure the phrase alone makes us). Phrases are matched on whole words,
+# so 'ham' never fires inside 'graham'. A phrase inside a longer matched phrase is ignored:
+# 'milk' doesn't count in 'almond milk', 'dairy' doesn't count in 'dairy free'.
+NON_VEGAN_TERMS = {
+    # Meat, fish, eggs
+    'chicken': 0.95, 'mutton': 0.95, 'lamb': 0.95, 'pork': 0.95, 'beef': 0.95, 'bacon': 0.95,
+    'ham': 0.95, 'salami': 0.95, 'pepperoni': 0.95, 'keema': 0.95, 'meat': 0.9, 'sausage': 0.8,
+    'fish': 0.95, 'prawn': 0.95, 'shrimp': 0.95, 'crab': 0.95, 'tuna': 0.95, 'salmon': 0.95,
+    'seafood': 0.95, 'anchovy': 0.95, 'egg': 0.9, 'omelette': 0.9, 'gelatin': 0.95, 'gelatine': 0.95,
+    # Dairy and other animal products
+    'milk': 0.85, 'milk chocolate': 0.9, 'ghee': 0.95, 'paneer': 0.95,
+    'cheese': 0.9, 'butter': 0.85, 'buttermilk': 0.95, 'curd': 0.95, 'dahi': 0.95, 'yogurt': 0.95,
+    'yoghurt': 0.95, 'lassi': 0.95, 'khoa': 0.95, 'khoya': 0.95, 'cream': 0.8, 'ice cream': 0.85,
+    'whey': 0.95, 'casein': 0.95, 'lactose': 0.9, 'lactose free': 0.8, 'dairy': 0.85,
+    'honey': 0.9, 'mayonnaise': 0.7,
+}
+# Explicit claims on the label. They name what the product replaces ('Vegan Butter',
+# 'Dairy Free Cheese', 'Eggless Mayonnaise'), so they win over the non-vegan words next to them.
+VEGAN_CLAIMS = {
+    'vegan': 0.95, 'plant based': 0.9, 'dairy free': 0.9, 'egg free': 0.9, 'eggless': 0.9,
+    'milk free': 0.9, 'non dairy': 0.9, 'dairy alternative': 0.9,
+}
+VEGAN_TERMS = {
+    # Plant versions of dairy words
+    'almond milk': 0.9, 'soy milk': 0.9, 'soya milk': 0.9, 'oat milk': 0.9, 'rice milk': 0.9,
+    'cashew milk': 0.9, 'coconut milk': 0.9, 'coconut cream': 0.9, 'peanut butter': 0.85,
+    'almond butter': 0.85, 'cocoa butter': 0.85, 'tofu': 0.9, 'soya chunk': 0.9,
+    # Plain produce and staples
+    'fruit': 0.6, 'vegetable': 0.6, 'onion': 0.6, 'potato': 0.6, 'tomato': 0.6, 'garlic': 0.6,
+    'ginger': 0.6, 'carrot': 0.6, 'spinach': 0.6, 'cabbage': 0.6, 'cauliflower': 0.6,
+    'apple': 0.6, 'banana': 0.6, 'mango': 0.6, 'orange': 0.6, 'grape': 0.6, 'lemon': 0.6,
+    'rice': 0.6, 'atta': 0.6, 'dal': 0.6, 'lentil': 0.6, 'chana': 0.6, 'rajma': 0.6,
+    'oat': 0.6, 'peanut': 0.6, 'almond': 0.6, 'cashew': 0.6,
+}
+# Category text is weaker evidence than the product's own name
+CATEGORY_WEIGHT = 0.8
+# A claim next to non-vegan words is still a claim, but a less certain one
+CLAIM_CONFLICT_FACTOR = 0.8
+# Below this gap between the vegan and non-vegan evidence the proposal is UNSURE
+MIN_MARGIN = 0.3
+
+
+def _tokens(text):
+    # Crude plural folding ('eggs' -> 'egg'), applied to the dictionary and the text alike
+    return [t[:-1] if len(t) > 3 and t.endswith('s') and not t.endswith('ss') else t
+            for t in normalize_text(text).split()]
+
+
+class KeywordAutomaton:
+    """
+    Aho–Corasick automaton over words instead of characters. All phrases are found in a
+    single left-to-right pass, whatever the size of the dictionary.
+    """
+
+    def __init__(self, patterns):
+        # patterns: {phrase: value}
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        self.values = []
+
+        # 1. Trie of all phrases
+        for phrase, value in patterns.items():
+            words = _tokens(phrase)
+            state = 0
+            for word in words:
+                if word not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                    self.goto[state][word] = len(self.goto) - 1
+                state = self.goto[state][word]
+            self.out[state].append(len(self.values))
+            self.values.append((len(words), value))
+
+        # 2. Failure links (breadth first), each state also reports its failure state's phrases
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(word, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+                queue.append(child)
+
+    def find(self, words):
+        """Returns (start, end, value) for every phrase in `words`, minus phrases inside longer ones."""
+        goto, fail, out = self.goto, self.fail, self.out
+        matches = []
+        state = 0
+        for end, word in enumerate(words, 1):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for pattern in out[state]:
+                length, value = self.values[pattern]
+                matches.append((end - length, end, value))
+        if len(matches) < 2:
+            return matches
+        return [
+            m for m in matches
+            if not any(o[0] <= m[0] and m[1] <= o[1] and o[1] - o[0] > m[1] - m[0] for o in matches)
+        ]
+
+
+AUTOMATON = KeywordAutomaton({
+    **{phrase: ('NON_VEGAN', weight) for phrase, weight in NON_VEGAN_TERMS.items()},
+    **{phrase: ('VEGAN', weight) for phrase, weight in VEGAN_TERMS.items()},
+    **{phrase: ('CLAIM', weight) for phrase, weight in VEGAN_CLAIMS.items()},
+})
+
+
+def classify(name, category=None):
+    """
+    'Chicken Curry Cut' -> ('NON_VEGAN', 0.95), 'Eggless Mayonnaise' -> ('VEGAN', 0.72),
+    'Onion Pyaz' -> ('VEGAN', 0.6), 'Xyz 500g' -> None (no keyword matched).
+    Returns (proposed status, confidence between 0 and 1) or None.
+    """
+    evidence = {'VEGAN': 0.0, 'NON_VEGAN': 0.0, 'CLAIM': 0.0}
+    for text, factor in ((name, 1.0), (category, CATEGORY_WEIGHT)):
+        for _, _, (status, weight) in AUTOMATON.find(_tokens(text)):
+            evidence[status] = max(evidence[status], weight * factor)
+
+    if evidence['CLAIM']:
+        factor = CLAIM_CONFLICT_FACTOR if evidence['NON_VEGAN'] else 1.0
+        return 'VEGAN', round(evidence['CLAIM'] * factor, 2)
+    if not evidence['VEGAN'] and not evidence['NON_VEGAN']:
+        return None
+    margin = abs(evidence['VEGAN'] - evidence['NON_VEGAN'])
+    if margin < MIN_MARGIN:
+        # Conflicting keywords: flag it for a reviewer, confidence is the stronger signal
+        return 'UNSURE', round(max(evidence.values()), 2)
+    return ('VEGAN' if evidence['VEGAN'] > evidence['NON_VEGAN'] else 'NON_VEGAN'), round(margin, 2)
+
+
+def propose_pending_statuses():
+    """
+    Classifies every PENDING product and stores the result in proposed_status /
+    proposed_confidence (Postgres, same COPY approach as imports). vegan_status itself is
+    never written, and rows decided meanwhile lose their proposal instead. Proposals aren't part
+    of the public API, so updated_at is left alone. Returns the number of rows changed.
+    """
+    rows = (Product.objects.filter(vegan_status='PENDING')
+            .values_list('id', 'name', 'category').iterator(chunk_size=5000))
+
+    data_buffer = StringIO()
+    for product_id, name, category in rows:
+        proposal = classify(name, category)
+        if proposal:
+            data_buffer.write(f'{product_id}\t{proposal[0]}\t{proposal[1]}\n')
+    data_buffer.seek(0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("""
+            CREATE TEMP TABLE products_product_proposals (
+                id bigint PRIMARY KEY, status varchar(20), confidence double precision
+            ) ON COMMIT DROP;
+        """)
+        cursor.copy_from(data_buffer, 'products_product_proposals', columns=('id', 'status', 'confidence'))
+
+        # 1. New or changed proposals (vegan_status re-checked here, a reviewer may have been faster)
+        cursor.execute("""
+            UPDATE products_product p
+            SET proposed_status = c.status, proposed_confidence = c.confidence
+            FROM products_product_proposals c
+            WHERE p.id = c.id AND p.vegan_status = 'PENDING'
+              AND (p.proposed_status, p.proposed_confidence) IS DISTINCT FROM (c.status, c.confidence);
+        """)
+        changed = cursor.rowcount
+
+        # 2. Stale proposals: products that were decided meanwhile (by a reviewer or the feed)
+        #    and pending products that no longer match anything (e.g. renamed)
+        cursor.execute("""
+            UPDATE products_product p
+            SET proposed_status = NULL, proposed_confidence = NULL
+            WHERE p.proposed_status IS NOT NULL AND (
+                p.vegan_status <> 'PENDING'
+                OR NOT EXISTS (SELECT 1 FROM products_product_proposals c WHERE c.id = p.id)
+            );
+        """)
+        changed += cursor.rowcount
+
+    return changed
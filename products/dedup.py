@@ -0,0 +1,170 @@
+import random
+import re
+import zlib
+from collections import defaultdict
+from io import StringIO
+from django.db import connection, transaction
+from .models import Product
+
+# --- Name normalization ---
+# Vendors decorate names differently: Blinkit appends the Hindi name ("Onion Pyaz"),
+# Swiggy puts the regional name in brackets ("Onion (Eerulli)"), and pack sizes vary.
+PARENTHESES_RE = re.compile(r'\([^)]*\)')
+PACK_SIZE_RE = re.compile(r'\b\d+(?:\.\d+)?\s*(?:g|gm|gms|kg|ml|l|ltr|pc|pcs|pack|x)\b')
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = {'and', 'the', 'of', 'with', 'fresh', 'n', 'a'}
+# Hindi names Blinkit appends without brackets ('Hybrid Tomato Tamatar'), dropped like stopwords
+# so both vendors' names reduce to the same English words
+REGIONAL_NAMES = {
+    'aloo', 'pyaz', 'tamatar', 'hari', 'mirch', 'adrak', 'lehsun', 'kheera', 'lauki', 'gol',
+    'chukandar', 'gajar', 'patta', 'gobhi', 'phool', 'baingan', 'sahjan', 'kachhi', 'haldi',
+    'tinda', 'sirka', 'gwar', 'phali', 'bhutta', 'kacha', 'kela', 'papita', 'tori', 'lobia',
+    'karela', 'bhindi', 'matar', 'palak', 'methi', 'dhaniya', 'pudina', 'mooli', 'nimbu', 'shimla',
+}
+
+# --- MinHash / LSH settings ---
+# 8 bands of 2 hashes: pairs with Jaccard 0.6 become candidates ~97% of the time,
+# unrelated names (Jaccard < 0.2) rarely do. Candidates are then checked exactly.
+NUM_BANDS = 8
+ROWS_PER_BAND = 2
+SIMILARITY_THRESHOLD = 0.6
+# Sharing a single word isn't enough ('Tomato' vs 'Tomato Ketchup'): names that share fewer
+# words than this only match if they normalize to exactly the same words
+MIN_SHARED_TOKENS = 2
+# Buckets this large come from very generic names; comparing inside them would go quadratic
+MAX_BUCKET_SIZE = 500
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed seed so the same catalog always produces the same groups
+_rng = random.Random(20240101)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_BANDS * ROWS_PER_BAND)
+]
+
+
+def normalize_name(name):
+    """'Onion (Eerulli) 500 g' -> ('onion',), 'Onion Pyaz' -> ('onion',)"""
+    name = PARENTHESES_RE.sub(' ', (name or '').lower())
+    name = PACK_SIZE_RE.sub(' ', name)
+    tokens = TOKEN_RE.findall(name)
+    return tuple(sorted({t for t in tokens if t not in STOPWORDS and t not in REGIONAL_NAMES}))
+
+
+def _minhash(tokens):
+    # crc32 is stable between runs (unlike hash()), which keeps the grouping deterministic
+    hashes = [zlib.crc32(t.encode('utf-8')) for t in tokens]
+    return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def _is_duplicate(a, b):
+    a, b = set(a), set(b)
+    shared = len(a & b)
+    if shared < MIN_SHARED_TOKENS:
+        return a == b
+    return shared / len(a | b) >= SIMILARITY_THRESHOLD
+
+
+def find_duplicate_groups(rows):
+    """
+    Groups near-identical product names sold by *different* vendors.
+
+    `rows` is an iterable of (id, name, vendor). Returns {product_id: group_id} for every
+    product that has at least one duplicate; group_id is the lowest product id in the group.
+    Runs in roughly linear time: each row is hashed into NUM_BANDS buckets and only rows
+    sharing a bucket are compared.
+    """
+    ids, tokens, vendors = [], [], []
+    buckets = defaultdict(list)
+
+    # 1. Signatures: bucket every product by each band of its MinHash signature
+    for product_id, name, vendor in rows:
+        normalized = normalize_name(name)
+        if not normalized:
+            continue
+        index = len(ids)
+        ids.append(product_id)
+        tokens.append(normalized)
+        vendors.append((vendor or '').strip().lower())
+
+        signature = _minhash(normalized)
+        for band in range(NUM_BANDS):
+            start = band * ROWS_PER_BAND
+            buckets[(band, *signature[start:start + ROWS_PER_BAND])].append(index)
+
+    # 2. Union-find over verified candidate pairs
+    parent = list(range(len(ids)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    checked = set()
+    for members in buckets.values():
+        if len(members) < 2 or len(members) > MAX_BUCKET_SIZE:
+            continue
+        for x, i in enumerate(members):
+            for j in members[x + 1:]:
+                # Same vendor listings are variants, not duplicates
+                if vendors[i] == vendors[j] or (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                if _is_duplicate(tokens[i], tokens[j]):
+                    parent[find(i)] = find(j)
+
+    # 3. Label every multi-member group with its lowest product id
+    members_by_root = defaultdict(list)
+    for i in range(len(ids)):
+        members_by_root[find(i)].append(ids[i])
+
+    groups = {}
+    for members in members_by_root.values():
+        if len(members) > 1:
+            group_id = min(members)
+            for product_id in members:
+                groups[product_id] = group_id
+    return groups
+
+
+def assign_duplicate_groups():
+    """
+    Recomputes Product.group_id for the whole catalog (Postgres, same COPY approach as imports).
+    Only rows whose group actually changed are written, and they get a new updated_at so the
+    delta sync API passes the change on. Returns the number of rows changed.
+    """
+    rows = Product.objects.values_list('id', 'name', 'vendor').iterator(chunk_size=5000)
+    groups = find_duplicate_groups(rows)
+
+    data_buffer = StringIO()
+    for product_id, group_id in groups.items():
+        data_buffer.write(f'{product_id}\t{group_id}\n')
+    data_buffer.seek(0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute("""
+            CREATE TEMP TABLE products_product_groups (id bigint PRIMARY KEY, group_id bigint)
+            ON COMMIT DROP;
+        """)
+        cursor.copy_from(data_buffer, 'products_product_groups', columns=('id', 'group_id'))
+
+        # 1. New or changed groups
+        cursor.execute("""
+            UPDATE products_product p
+            SET group_id = g.group_id, updated_at = now()
+            FROM products_product_groups g
+            WHERE p.id = g.id AND p.group_id IS DISTINCT FROM g.group_id;
+        """)
+        changed = cursor.rowcount
+
+        # 2. Products that no longer have a duplicate
+        cursor.execute("""
+            UPDATE products_product p
+            SET group_id = NULL, updated_at = now()
+            WHERE p.group_id IS NOT NULL
+              AND NOT EXISTS (SELECT 1 FROM products_product_groups g WHERE g.id = p.id);
+        """)
+        changed += cursor.rowcount
+
+    return changed
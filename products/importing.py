@@ -0,0 +1,131 @@
+from django.db import connection, transaction
+from . import autocomplete
+from .classify import propose_pending_statuses
+from .dedup import assign_duplicate_groups
+from .partitions import ensure_vendor_partitions, is_partitioned
+from .models import Product
+from .profiling import NO_TIMER
+from .snapshots import build_catalog_snapshot_safely
+
+# Columns written by both import paths (admin upload and import_products), in COPY order.
+IMPORT_COLUMNS = ('product_link', 'name', 'image_url', 'vegan_status', 'vendor', 'category')
+
+
+def _create_vendor_partitions(data_buffer):
+    """
+    Creates the partitions for vendors that are new in this feed, in a short transaction of its own:
+    creating a partition locks the whole products table until commit, so it mustn't happen inside
+    the (long) import transaction. A vendor whose key comes out differently here than in the
+    staging table simply lands in the default partition.
+    """
+    column = IMPORT_COLUMNS.index('vendor')
+    vendors = {line.split('\t')[column] for line in data_buffer if line.strip()}
+    data_buffer.seek(0)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        # Same expression as the staging table's vendor_key
+        cursor.execute("SELECT DISTINCT LOWER(TRIM(v)) FROM unnest(%s::text[]) AS v;", [sorted(vendors)])
+        ensure_vendor_partitions(row[0] for row in cursor.fetchall())
+
+
+def sync_products(data_buffer, replace=True, vendor=None, timer=NO_TIMER):
+    """
+    Merges a tab-separated COPY buffer into products_product.
+
+    Instead of wiping the table, the rows are COPY'd into a temporary staging
+    table and merged in, so only rows that actually changed get a new
+    `updated_at`. With replace=True, products missing from the buffer are
+    deleted and a tombstone is recorded for each one. After commit a new
+    catalog snapshot is built (see snapshots.py).
+
+    With `vendor` set, the buffer is that vendor's whole feed: only that vendor's
+    products (one partition on Postgres, see partitions.py) are replaced.
+
+    Pass a profiling.StageTimer as `timer` to get per-stage timings.
+
+    Returns a (changed, deleted) tuple of row counts.
+    """
+    columns = ', '.join(IMPORT_COLUMNS)
+    incoming = {c: f'EXCLUDED.{c}' for c in IMPORT_COLUMNS[1:]}
+    # A feed that doesn't know the status (PENDING) keeps whatever a reviewer decided
+    incoming['vegan_status'] = (
+        "CASE WHEN EXCLUDED.vegan_status = 'PENDING' THEN products_product.vegan_status "
+        "ELSE EXCLUDED.vegan_status END"
+    )
+    excluded = ', '.join(incoming.values())
+    current = ', '.join(f'products_product.{c}' for c in incoming)
+    updates = ', '.join(f'{c} = {value}' for c, value in incoming.items())
+    deleted = 0
+    vendor_key = Product.vendor_key_for(vendor) if vendor else None
+
+    # 0. New vendors get their partition up front (Postgres only, see partitions.py)
+    if is_partitioned():
+        with timer.stage('partitions'):
+            _create_vendor_partitions(data_buffer)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # 1. Load the CSV data into a staging table that lives for this transaction only
+            with timer.stage('copy'):
+                cursor.execute("""
+                    CREATE TEMP TABLE products_product_staging (
+                        product_link varchar(1024), name varchar(255), image_url varchar(1024),
+                        vegan_status varchar(20), vendor varchar(255), category varchar(255),
+                        vendor_key varchar(255) GENERATED ALWAYS AS (LOWER(TRIM(COALESCE(vendor, '')))) STORED
+                    ) ON COMMIT DROP;
+                """)
+                cursor.copy_from(data_buffer, 'products_product_staging', columns=IMPORT_COLUMNS, null='')
+                cursor.execute("ANALYZE products_product_staging;")
+
+            # 2. Upsert: new links are inserted, existing links are only touched if something changed
+            with timer.stage('merge'):
+                cursor.execute(f"""
+                    INSERT INTO products_product ({columns}, vendor_key, updated_at)
+                    SELECT DISTINCT ON (vendor_key, product_link) {columns}, vendor_key, now()
+                    FROM products_product_staging
+                    ORDER BY vendor_key, product_link
+                    ON CONFLICT (vendor_key, product_link) DO UPDATE
+                    SET {updates}, updated_at = now()
+                    WHERE ({current}) IS DISTINCT FROM ({excluded});
+                """)
+                changed = cursor.rowcount
+
+                # 3. Remove products that are no longer in the feed and leave a tombstone behind
+                #    (vendor imports only look at that vendor's partition)
+                if replace:
+                    cursor.execute(f"""
+                        WITH gone AS (
+                            DELETE FROM products_product p
+                            WHERE {'p.vendor_key = %s AND' if vendor_key is not None else ''} NOT EXISTS (
+                                SELECT 1 FROM products_product_staging s
+                                WHERE s.vendor_key = p.vendor_key AND s.product_link = p.product_link
+                            )
+                            RETURNING p.vendor_key, p.product_link
+                        )
+                        INSERT INTO products_producttombstone (vendor_key, product_link, deleted_at)
+                        SELECT vendor_key, product_link, now() FROM gone
+                        ON CONFLICT (vendor_key, product_link) DO UPDATE SET deleted_at = EXCLUDED.deleted_at;
+                    """, [vendor_key] if vendor_key is not None else None)
+                    deleted = cursor.rowcount
+
+                # 4. Products that came back are no longer deleted
+                cursor.execute("""
+                    DELETE FROM products_producttombstone t
+                    USING products_product_staging s
+                    WHERE t.vendor_key = s.vendor_key AND t.product_link = s.product_link;
+                """)
+
+        # 5. Group the same product sold by different vendors (MinHash/LSH, see dedup.py)
+        with timer.stage('dedup'):
+            assign_duplicate_groups()
+
+        # 6. Suggest a status for products the feed left PENDING (keyword automaton, see classify.py)
+        with timer.stage('classify'):
+            propose_pending_statuses()
+
+        # 7. Once the data is committed, publish a fresh catalog snapshot for app cold starts
+        transaction.on_commit(build_catalog_snapshot_safely)
+        # ...and let this process pick up the new catalog in autocomplete right away
+        transaction.on_commit(autocomplete.invalidate)
+
+    return changed, deleted
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from products.snapshots import build_catalog_snapshot
+
+class Command(BaseCommand):
+    help = 'Builds the content-hashed catalog snapshot files served at /api/products/snapshot/.'
+
+    def handle(self, *args, **options):
+        # Imports do this automatically; this is for the first deploy or after a manual DB change
+        manifest = build_catalog_snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot {manifest['version']} written: {manifest['count']} products, "
+            f"{len(manifest['categories'])} category files."
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from products.classify import propose_pending_statuses
+from products.models import Product
+
+class Command(BaseCommand):
+    help = 'Proposes a vegan status (with a confidence score) for every PENDING product.'
+
+    def handle(self, *args, **options):
+        # Imports do this automatically; this is for backfilling existing data
+        # or re-running after the keyword dictionaries in classify.py change
+        changed = propose_pending_statuses()
+
+        counts = (Product.objects.filter(vegan_status='PENDING')
+                  .values_list('proposed_status').annotate(n=Count('id')).order_by('proposed_status'))
+        summary = ', '.join(f"{n} {status or 'no match'}" for status, n in counts)
+        self.stdout.write(self.style.SUCCESS(
+            f'Classification finished! {changed} proposals changed. Pending products: {summary or "none"}.'
+        ))
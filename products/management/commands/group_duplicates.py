@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from products.dedup import assign_duplicate_groups
+
+class Command(BaseCommand):
+    help = 'Recomputes cross-vendor duplicate groups (Product.group_id) for the whole catalog.'
+
+    def handle(self, *args, **options):
+        # Imports do this automatically; this is for backfilling existing data
+        changed = assign_duplicate_groups()
+        self.stdout.write(self.style.SUCCESS(f'Duplicate grouping finished! {changed} products changed group.'))
@@ -1,18 +1,13 @@
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
-from products.models import Product
 
 class Command(BaseCommand):
-    help = 'Deletes all products and re-imports from master CSV.'
+    help = 'Re-imports products from master CSV, removing products that are no longer in it.'
 
     def handle(self, *args, **options):
-        # 1. Delete all existing products
-        self.stdout.write(self.style.WARNING('Deleting all existing products...'))
-        count, _ = Product.objects.all().delete()
-        self.stdout.write(self.style.SUCCESS(f'Deleted {count} products.'))
-        
-        # 2. Call the import_products command
+        # Products are merged instead of deleted and re-created, so unchanged rows keep
+        # their updated_at and removed ones leave a tombstone for the delta sync API.
         self.stdout.write('Running import_products command...')
-        call_command('import_products')
+        call_command('import_products', replace=True)
         
-        self.stdout.write(self.style.SUCCESS('Data refresh complete!'))
\ No newline at end of file
+        self.stdout.write(self.style.SUCCESS('Data refresh complete!'))
@@ -0,0 +1,36 @@
+import os
+from django.conf import settings
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class SnapshotWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise only scans STATIC_ROOT once at startup, but catalog snapshots are written
+    later by imports. For URLs under the snapshot folder we look the file up on a miss
+    and add it to WhiteNoise's table, so it gets the same headers and gzip handling.
+    Snapshot files are deleted again two imports later (see snapshots.py), so entries whose
+    file is gone are dropped from the table and the request falls through to a 404.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.snapshot_root = os.path.abspath(settings.CATALOG_SNAPSHOT_ROOT) + os.path.sep
+        self.snapshot_prefix = self.static_prefix + os.path.relpath(
+            settings.CATALOG_SNAPSHOT_ROOT, settings.STATIC_ROOT
+        ).replace(os.path.sep, '/') + '/'
+
+    def __call__(self, request):
+        url = request.path_info
+        if not self.autorefresh and url.startswith(self.snapshot_prefix):
+            path = os.path.join(self.snapshot_root, url[len(self.snapshot_prefix):])
+            if url in self.files:
+                if not os.path.isfile(path):
+                    self.files.pop(url, None)
+            elif (
+                self.url_is_canonical(url)
+                and self.path_is_child_of(path, self.snapshot_root)
+                and os.path.isfile(path)
+                and not self.is_compressed_variant(path)
+            ):
+                self.add_file_to_dictionary(url, path)
+        return super().__call__(request)
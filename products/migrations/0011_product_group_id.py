@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_product_change_tracking'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='group_id',
+            field=models.BigIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0013_product_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='product',
+            name='product_vendor_upper_idx',
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='vendor_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        # Fill the new key before the per-vendor unique constraint is added
+        migrations.RunSQL(
+            "UPDATE products_product SET vendor_key = LOWER(TRIM(COALESCE(vendor, '')));",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddField(
+            model_name='productimport',
+            name='vendor',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='product',
+            name='product_link',
+            field=models.URLField(db_index=True, max_length=1024),
+        ),
+        migrations.AddConstraint(
+            model_name='product',
+            constraint=models.UniqueConstraint(fields=('vendor_key', 'product_link'), name='product_vendor_link_uniq'),
+        ),
+    ]
@@ -0,0 +1,96 @@
+from django.db import migrations
+
+from products.partitions import DEFAULT_PARTITION, partition_name
+
+
+def rebuild_products_table(schema_editor, partitioned):
+    """
+    Recreates products_product either LIST-partitioned by vendor_key or as a plain table,
+    copying the rows and re-creating every constraint and index under its original name
+    (so later Django migrations still find them). Postgres only, other databases keep the plain table.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        # 1. Remember constraints and indexes before the names get taken by the old table
+        #    (in a fixed order: the planner breaks cost ties between indexes by creation order)
+        cursor.execute("""
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = 'products_product'::regclass AND contype IN ('p', 'u')
+            ORDER BY conname;
+        """)
+        constraints = cursor.fetchall()
+        cursor.execute("""
+            SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+            WHERE i.indrelid = 'products_product'::regclass
+              AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid)
+            ORDER BY i.indexrelid::regclass::text;
+        """)
+        indexes = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM products_product;")
+        next_id = cursor.fetchone()[0]
+        cursor.execute("SELECT DISTINCT vendor_key FROM products_product WHERE vendor_key <> '';")
+        vendor_keys = [row[0] for row in cursor.fetchall()]
+
+        # 2. New table with the same columns
+        cursor.execute("ALTER TABLE products_product RENAME TO products_product_old;")
+        cursor.execute(
+            "CREATE TABLE products_product (LIKE products_product_old INCLUDING DEFAULTS)"
+            + (" PARTITION BY LIST (vendor_key);" if partitioned else ";")
+        )
+        cursor.execute("ALTER TABLE products_product ALTER COLUMN id DROP DEFAULT;")
+
+        # 3. One partition per vendor, plus a default one for unknown / new vendors
+        if partitioned:
+            cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF products_product DEFAULT;")
+            for vendor_key in vendor_keys:
+                cursor.execute(
+                    f'CREATE TABLE "{partition_name(vendor_key)}" PARTITION OF products_product FOR VALUES IN (%s);',
+                    [vendor_key],
+                )
+
+        # 4. Move the rows over and drop the old table (and its id sequence)
+        cursor.execute("INSERT INTO products_product SELECT * FROM products_product_old;")
+        cursor.execute("DROP TABLE products_product_old;")
+
+        # 5. Ids: identity columns aren't allowed on partitioned tables before Postgres 17,
+        #    so the partitioned table uses a plain sequence
+        if partitioned:
+            cursor.execute("CREATE SEQUENCE products_product_id_seq OWNED BY products_product.id;")
+            cursor.execute("SELECT setval('products_product_id_seq', %s, false);", [next_id])
+            cursor.execute("ALTER TABLE products_product ALTER COLUMN id SET DEFAULT nextval('products_product_id_seq');")
+        else:
+            cursor.execute(
+                f"ALTER TABLE products_product ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY (START WITH {int(next_id)});"
+            )
+
+        # 6. Constraints and indexes, same names as before.
+        #    A partitioned table's primary key has to include the partition key.
+        for name, definition in constraints:
+            if definition.startswith('PRIMARY KEY'):
+                definition = 'PRIMARY KEY (id, vendor_key)' if partitioned else 'PRIMARY KEY (id)'
+            cursor.execute(f'ALTER TABLE products_product ADD CONSTRAINT "{name}" {definition};')
+        for definition in indexes:
+            cursor.execute(definition.replace(' ON ONLY ', ' ON '))
+
+        cursor.execute("ANALYZE products_product;")
+
+
+def partition(apps, schema_editor):
+    rebuild_products_table(schema_editor, partitioned=True)
+
+
+def unpartition(apps, schema_editor):
+    rebuild_products_table(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0014_product_vendor_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
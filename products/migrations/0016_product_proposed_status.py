@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0015_partition_products_by_vendor'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='proposed_confidence',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='proposed_status',
+            field=models.CharField(blank=True, choices=[('PENDING', 'Pending Review'), ('VEGAN', 'Vegan'), ('NON_VEGAN', 'Not Vegan'), ('UNSURE', 'Unsure')], max_length=20, null=True),
+        ),
+    ]
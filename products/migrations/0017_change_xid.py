@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:44
+
+from django.db import migrations, models
+
+# Every write that sets updated_at / deleted_at (ORM saves, import SQL, dedup, admin actions)
+# also records its transaction id, so sync tokens can follow commit order (see sync.py).
+TABLES = {'products_product': 'updated_at', 'products_producttombstone': 'deleted_at'}
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("""
+        CREATE FUNCTION products_stamp_change_xid() RETURNS trigger AS $$
+        BEGIN
+            NEW.change_xid := pg_current_xact_id()::text::bigint;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    for table, column in TABLES.items():
+        # BEFORE ROW triggers on a partitioned table are cloned to every (future) partition
+        schema_editor.execute(
+            f'CREATE TRIGGER {table}_change_xid BEFORE INSERT OR UPDATE OF {column} ON {table} '
+            f'FOR EACH ROW EXECUTE FUNCTION products_stamp_change_xid();'
+        )
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in TABLES:
+        schema_editor.execute(f'DROP TRIGGER {table}_change_xid ON {table};')
+    schema_editor.execute('DROP FUNCTION products_stamp_change_xid();')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0016_product_proposed_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='change_xid',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='producttombstone',
+            name='change_xid',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0017_change_xid'),
+    ]
+
+    operations = [
+        # Old tombstones don't say which vendor's copy went. Sync tokens from before this
+        # migration start over with a full sync (see sync.py), so nobody needs them anymore.
+        migrations.RunSQL(
+            "DELETE FROM products_producttombstone;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AddField(
+            model_name='producttombstone',
+            name='vendor_key',
+            field=models.CharField(blank=True, default='', editable=False, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='producttombstone',
+            name='product_link',
+            field=models.URLField(max_length=1024),
+        ),
+        migrations.AddConstraint(
+            model_name='producttombstone',
+            constraint=models.UniqueConstraint(fields=('vendor_key', 'product_link'), name='tombstone_vendor_link_uniq'),
+        ),
+    ]
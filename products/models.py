@@ -1,8 +1,9 @@
 from django.db import models
+from django.db.models.functions import Now, Upper
 
 class Product(models.Model):
-    # The unique URL, this is our primary way of identifying a product.
-    product_link = models.URLField(max_length=1024, unique=True, db_index=True)
+    # The URL, this is our primary way of identifying a product (unique per vendor, see Meta).
+    product_link = models.URLField(max_length=1024, db_index=True)
     
     # The name of the product.
     name = models.CharField(max_length=255)
@@ -20,6 +21,11 @@ class Product(models.Model):
     # --- The Vendor Field ---
     vendor = models.CharField(max_length=255, blank=True, null=True)
     
+    # --- Partition Key ---
+    # Lower-cased vendor ('' if unknown), kept in sync by save() and the imports.
+    # On Postgres products_product is partitioned by this column (see partitions.py).
+    vendor_key = models.CharField(max_length=255, blank=True, default='', editable=False)
+    
     # --- The Vegan Status Field ---
     # Using choices makes data entry consistent.
     STATUS_CHOICES = [
@@ -34,12 +40,87 @@ class Product(models.Model):
         default='PENDING'
     )
 
+    # --- Classifier Proposal ---
+    # For PENDING products: the status suggested by the keyword classifier (classify.py) and
+    # how sure it is (0-1). Only a reviewer changes vegan_status.
+    proposed_status = models.CharField(max_length=20, choices=STATUS_CHOICES, blank=True, null=True)
+    proposed_confidence = models.FloatField(blank=True, null=True)
+
     # --- Product Category Field ---
-    category = models.CharField(max_length=255, blank=True, null=True)
+    # Indexed for the sidebar's DISTINCT category list
+    category = models.CharField(max_length=255, blank=True, null=True, db_index=True)
+
+    # --- Cross-vendor Duplicates ---
+    # Products from different vendors that look like the same item share a group_id
+    # (the lowest product id in the group). Null means no known duplicate. Set by dedup.py.
+    group_id = models.BigIntegerField(blank=True, null=True, db_index=True)
+
+    # --- Change Tracking (used by the delta sync API) ---
+    # auto_now covers admin edits, db_default covers rows written by COPY/raw SQL.
+    updated_at = models.DateTimeField(auto_now=True, db_default=Now(), db_index=True)
+    # Postgres only: id of the transaction that last set updated_at, stamped by a trigger
+    # (migration 0017). Sync tokens compare against this, see sync.py.
+    change_xid = models.BigIntegerField(blank=True, null=True, db_index=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Matches the list API's ORDER BY name, id, so pages are read in index order (no sort)
+            models.Index(fields=['name', 'id'], name='product_name_id_idx'),
+            # The list API filters case-insensitively (iexact -> UPPER(col) = UPPER(value)).
+            # Vendor filters use vendor_key instead, which prunes to a single partition.
+            models.Index(Upper('category'), name='product_category_upper_idx'),
+            models.Index(Upper('vegan_status'), name='product_status_upper_idx'),
+        ]
+        constraints = [
+            # Postgres needs the partition key in every unique constraint, so links are unique per vendor
+            models.UniqueConstraint(fields=['vendor_key', 'product_link'], name='product_vendor_link_uniq'),
+        ]
+
+    @staticmethod
+    def vendor_key_for(vendor):
+        return (vendor or '').strip().lower()
+
+    def save(self, *args, **kwargs):
+        self.vendor_key = self.vendor_key_for(self.vendor)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
 
+# Fields returned for every product by the API (list, changes and catalog snapshots)
+PRODUCT_FIELDS = (
+    'name', 
+    'product_link', 
+    # 'description',
+    'image_url', 
+    'price',
+    'vendor',
+    'vendor_key',
+    'vegan_status',
+    'category',
+    'group_id'
+)
+
+# --- Tombstones: remember deleted products so clients can drop them ---
+class ProductTombstone(models.Model):
+    # Same key as Product (link per vendor), so a product that comes back simply clears its
+    # tombstone, and a vendor dropping a link others still sell still reaches clients.
+    vendor_key = models.CharField(max_length=255, blank=True, default='', editable=False)
+    product_link = models.URLField(max_length=1024)
+
+    # When the product disappeared from the catalog.
+    deleted_at = models.DateTimeField(db_default=Now(), db_index=True)
+    # Postgres only: id of the transaction that set deleted_at (same trigger as Product).
+    change_xid = models.BigIntegerField(blank=True, null=True, db_index=True, editable=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['vendor_key', 'product_link'], name='tombstone_vendor_link_uniq'),
+        ]
+
+    def __str__(self):
+        return self.product_link
+
 # --- NEW: Product Import Model for Admin Dashboard ---
 class ProductImport(models.Model):
     # This stores the actual CSV file
@@ -56,6 +137,10 @@ class ProductImport(models.Model):
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
     
+    # Optional: the CSV is this vendor's whole feed. Only this vendor's products are
+    # replaced (one partition on Postgres); leave blank to replace the whole catalog.
+    vendor = models.CharField(max_length=255, blank=True)
+    
     # Stores the success message or the specific error (e.g., "Missing column 'price'")
     log_message = models.TextField(blank=True)
 
@@ -0,0 +1,66 @@
+import hashlib
+import re
+from django.db import connection
+
+# On Postgres, products_product is LIST-partitioned by vendor_key (see migration 0015):
+# one partition per vendor plus products_product_default for unknown / new vendors.
+# On other databases (SQLite in development) it stays a plain table and these helpers do nothing.
+
+DEFAULT_PARTITION = 'products_product_default'
+
+
+def partition_name(vendor_key):
+    """'blinkit' -> 'products_product_v_blinkit_1b3c5d7e' (hash suffix keeps names unique and short)"""
+    slug = re.sub(r'[^a-z0-9]+', '_', vendor_key)[:30].strip('_')
+    digest = hashlib.md5(vendor_key.encode('utf-8')).hexdigest()[:8]
+    return f'products_product_v_{slug}_{digest}'
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'products_product'::regclass);"
+        )
+        return cursor.fetchone()[0]
+
+
+def ensure_vendor_partitions(vendor_keys):
+    """
+    Creates the partition for each vendor key that doesn't have one yet. Rows that were
+    already added for that vendor (e.g. through the admin) live in the default partition
+    and are moved over, otherwise Postgres refuses to create the partition.
+    Must run inside a transaction.
+    """
+    if not is_partitioned():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'products_product'::regclass;
+        """)
+        existing = {row[0] for row in cursor.fetchall()}
+
+        for vendor_key in sorted(set(vendor_keys)):
+            name = partition_name(vendor_key)
+            # '' (no vendor) stays in the default partition
+            if not vendor_key or name in existing:
+                continue
+
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE vendor_key = %s);", [vendor_key])
+            has_rows = cursor.fetchone()[0]
+            if has_rows:
+                cursor.execute(
+                    f"CREATE TEMP TABLE products_product_moving ON COMMIT DROP AS "
+                    f"SELECT * FROM {DEFAULT_PARTITION} WHERE vendor_key = %s;", [vendor_key]
+                )
+                cursor.execute(f"DELETE FROM {DEFAULT_PARTITION} WHERE vendor_key = %s;", [vendor_key])
+
+            cursor.execute(f'CREATE TABLE "{name}" PARTITION OF products_product FOR VALUES IN (%s);', [vendor_key])
+
+            if has_rows:
+                cursor.execute("INSERT INTO products_product SELECT * FROM products_product_moving;")
+                cursor.execute("DROP TABLE products_product_moving;")
+            existing.add(name)
@@ -0,0 +1,185 @@
+import cProfile
+import io
+import os
+import pstats
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from time import perf_counter
+from django.db import connection
+from django.http import JsonResponse
+
+# --- 1. Request profiling for staff (?_profile=1) ---
+
+def profile_if_requested(view):
+    """
+    Lets staff users add `?_profile=1` to an API URL to get a profiling report instead of the
+    normal response. When the parameter is absent this is a single dict lookup.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.GET.get('_profile') != '1' or not request.user.is_staff:
+            return view(request, *args, **kwargs)
+        return _profiled_response(view, request, *args, **kwargs)
+    return wrapper
+
+
+def _profiled_response(view, request, *args, **kwargs):
+    queries = []
+
+    def record_query(execute, sql, params, many, context):
+        query = {'sql': sql, 'params': params, 'fetch_ms': 0.0}
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            query['ms'] = (perf_counter() - start) * 1000
+            query['query'] = connection.ops.last_executed_query(context['cursor'], sql, params)
+            queries.append(query)
+            _time_fetches(context['cursor'], query)
+
+    # 1. Run the view (and drain streaming responses, that's where their work happens)
+    profiler = cProfile.Profile()
+    start = perf_counter()
+    with connection.execute_wrapper(record_query):
+        profiler.enable()
+        try:
+            response = view(request, *args, **kwargs)
+            body = b''.join(response.streaming_content) if response.streaming else response.content
+        finally:
+            profiler.disable()
+    total_ms = (perf_counter() - start) * 1000
+
+    # 2. Split the time: SQL (running queries + fetching their rows) vs JSON serialization vs everything else
+    stats = pstats.Stats(profiler)
+    serialization_ms = sum(
+        cumulative * 1000
+        for (filename, _, function), (_, _, _, cumulative, _) in stats.stats.items()
+        if function == 'dumps' and filename.endswith(os.path.join('json', '__init__.py'))
+    )
+    fetch_ms = sum(q['fetch_ms'] for q in queries)
+    db_ms = sum(q['ms'] for q in queries) + fetch_ms
+
+    profile_text = io.StringIO()
+    pstats.Stats(profiler, stream=profile_text).sort_stats('cumulative').print_stats(40)
+
+    return JsonResponse({
+        'path': request.get_full_path(),
+        'status': response.status_code,
+        'response_bytes': len(body),
+        'timings_ms': {
+            'total': round(total_ms, 3),
+            'db': round(db_ms, 3),
+            'db_fetch': round(fetch_ms, 3),
+            'serialization': round(serialization_ms, 3),
+            'other': round(max(total_ms - db_ms - serialization_ms, 0), 3),
+        },
+        'queries': [
+            {
+                'sql': q['query'], 'ms': round(q['ms'] + q['fetch_ms'], 3), 'fetch_ms': round(q['fetch_ms'], 3),
+                'plan': _explain(q['sql'], q['params']),
+            }
+            for q in queries
+        ],
+        'profile': profile_text.getvalue(),
+    })
+
+
+def _time_fetches(cursor, query):
+    """
+    execute_wrapper only sees execute(). Rows read afterwards (.iterator() chunks, server-side
+    cursors on Postgres) come from fetchmany() and friends, so those are timed on the cursor
+    and charged to the query it last ran.
+    """
+    cursor.profiled_query = query
+    if 'fetchmany' in vars(cursor):
+        return
+
+    def timed(fetch):
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return fetch(*args, **kwargs)
+            finally:
+                cursor.profiled_query['fetch_ms'] += (perf_counter() - start) * 1000
+        return wrapper
+
+    for name in ('fetchone', 'fetchmany', 'fetchall'):
+        setattr(cursor, name, timed(getattr(cursor, name)))
+
+
+def _explain(sql, params):
+    """EXPLAIN ANALYZE on Postgres (EXPLAIN QUERY PLAN on SQLite); only SELECTs are re-run."""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return None
+    if connection.vendor == 'postgresql':
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) '
+    elif connection.vendor == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(prefix + sql, params)
+        return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+
+
+# --- 2. Stage timings for imports (import_products --profile) ---
+
+class StageTimer:
+    """
+    Collects wall-clock time per named stage. Stages can nest; each stage only gets its own
+    (exclusive) time, so e.g. 'parse' time spent inside a 'clean' loop isn't counted twice.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._stack = []
+
+    def _add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0) + seconds
+        if self._stack:
+            self._stack[-1] += seconds
+
+    @contextmanager
+    def stage(self, name):
+        self._stack.append(0)
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - start
+            children = self._stack.pop()
+            self.stages[name] = self.stages.get(name, 0) + elapsed - children
+            if self._stack:
+                self._stack[-1] += elapsed
+
+    def timed_iter(self, name, iterable):
+        """Wraps an iterator, charging the time spent fetching each item to `name`."""
+        iterator = iter(iterable)
+        while True:
+            start = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self._add(name, perf_counter() - start)
+                return
+            self._add(name, perf_counter() - start)
+            yield item
+
+    def report(self):
+        total = sum(self.stages.values()) or 1
+        lines = [f'  {name:<10} {seconds:9.3f}s  {seconds / total:6.1%}' for name, seconds in self.stages.items()]
+        lines.append(f"  {'total':<10} {sum(self.stages.values()):9.3f}s")
+        return '\n'.join(lines)
+
+
+class _NoTimer:
+    """Stand-in used when profiling is off: no clocks, no wrappers."""
+
+    def stage(self, name):
+        return nullcontext()
+
+    def timed_iter(self, name, iterable):
+        return iterable
+
+
+NO_TIMER = _NoTimer()
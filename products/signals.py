@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Product, ProductTombstone
+
+# Bulk imports write tombstones in SQL (see importing.py).
+# These receivers cover products edited or deleted one by one through the ORM / admin.
+
+@receiver(post_delete, sender=Product)
+def record_tombstone(sender, instance, **kwargs):
+    ProductTombstone.objects.update_or_create(
+        vendor_key=instance.vendor_key,
+        product_link=instance.product_link,
+        defaults={'deleted_at': timezone.now()},
+    )
+
+@receiver(post_save, sender=Product)
+def clear_tombstone(sender, instance, created, **kwargs):
+    if created:
+        ProductTombstone.objects.filter(vendor_key=instance.vendor_key, product_link=instance.product_link).delete()
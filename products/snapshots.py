@@ -0,0 +1,178 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.text import slugify
+from .models import PRODUCT_FIELDS
+from .sync import changes
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def _temp_file(root, mode):
+    """
+    A uniquely named hidden file in `root`, so concurrent builds (an admin import next to
+    import_products) never write into each other's files. Returns (file, path).
+    """
+    fd, path = tempfile.mkstemp(dir=root, prefix='.catalog-', suffix='.tmp')
+    return os.fdopen(fd, mode), path
+
+
+def _publish(tmp_path, path):
+    # mkstemp files are private (0600); published files are served as static files
+    os.chmod(tmp_path, 0o644)
+    os.replace(tmp_path, path)
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class _SnapshotWriter:
+    """
+    Writes one NDJSON artifact and its .gz sibling in a single pass while hashing it.
+    WhiteNoise picks the .gz variant automatically for clients that accept gzip.
+    """
+
+    def __init__(self, root, stem):
+        self.root = root
+        self.stem = stem
+        self.plain, self.tmp_path = _temp_file(root, 'wb')
+        self.gz_file, self.gz_tmp_path = _temp_file(root, 'wb')
+        # mtime=0 and no file name in the header keep the gzip bytes identical for identical content
+        self.gz = gzip.GzipFile(filename='', mode='wb', fileobj=self.gz_file, mtime=0)
+        self.sha = hashlib.sha256()
+        self.count = 0
+
+    def write(self, line):
+        self.plain.write(line)
+        self.gz.write(line)
+        self.sha.update(line)
+        self.count += 1
+
+    def _close_files(self):
+        self.plain.close()
+        self.gz.close()
+        self.gz_file.close()
+
+    def close(self):
+        """Moves the artifact to its content-hashed name and returns that name."""
+        self._close_files()
+        # 12 hex chars, same naming scheme as Django's ManifestStaticFilesStorage
+        name = f'{self.stem}.{self.sha.hexdigest()[:12]}.ndjson'
+        _publish(self.gz_tmp_path, os.path.join(self.root, name + '.gz'))
+        _publish(self.tmp_path, os.path.join(self.root, name))
+        return name
+
+    def discard(self):
+        """Removes the temporary files of an artifact that won't be published."""
+        self._close_files()
+        _remove_quietly(self.gz_tmp_path)
+        _remove_quietly(self.tmp_path)
+
+
+def read_manifest():
+    """Returns the current snapshot manifest, or None if no snapshot was built yet."""
+    try:
+        with open(os.path.join(settings.CATALOG_SNAPSHOT_ROOT, MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def build_catalog_snapshot():
+    """
+    Dumps the whole catalog as content-hashed NDJSON files (one full file plus one per category)
+    and points manifest.json at them. Files from the previous snapshot are kept so clients that
+    are mid-download don't break; anything older is removed.
+    """
+    root = settings.CATALOG_SNAPSHOT_ROOT
+    os.makedirs(root, exist_ok=True)
+
+    # Remember where the catalog was, so clients can continue with /changes/?since=<sync_token>
+    sync_token, rows, _ = changes()
+    previous = read_manifest()
+
+    # 1. One pass over the table, ordered by category so each category file is written in one go
+    full = _SnapshotWriter(root, 'catalog')
+    categories = {}
+    current_category, current_writer = None, None
+
+    try:
+        rows = rows.order_by('category', 'name', 'id').values(*PRODUCT_FIELDS)
+        for row in rows.iterator(chunk_size=2000):
+            line = (json.dumps(row, cls=DjangoJSONEncoder) + '\n').encode('utf-8')
+            full.write(line)
+
+            category = row['category']
+            if not category:
+                # Uncategorized products only go into the full file (same as category_list_api)
+                continue
+            if category != current_category:
+                if current_writer:
+                    categories[current_category] = {'file': current_writer.close(), 'count': current_writer.count}
+                    current_writer = None
+                current_category = category
+                current_writer = _SnapshotWriter(root, f'catalog-{slugify(category) or "category"}')
+            current_writer.write(line)
+
+        if current_writer:
+            categories[current_category] = {'file': current_writer.close(), 'count': current_writer.count}
+            current_writer = None
+        full_name = full.close()
+    except Exception:
+        # Don't leave half-written temp files behind (published artifacts go with the next cleanup)
+        for writer in (full, current_writer):
+            if writer:
+                writer.discard()
+        raise
+
+    # 2. Publish the new manifest (atomic rename, readers never see a half-written file)
+    manifest = {
+        'version': full_name.split('.')[1],
+        'generated_at': timezone.now().isoformat(),
+        'sync_token': sync_token,
+        'count': full.count,
+        'full': full_name,
+        'categories': categories,
+    }
+    f, tmp_manifest = _temp_file(root, 'w')
+    try:
+        with f:
+            json.dump(manifest, f)
+        _publish(tmp_manifest, os.path.join(root, MANIFEST_NAME))
+    except Exception:
+        _remove_quietly(tmp_manifest)
+        raise
+
+    # 3. Clean up artifacts that neither this nor the previous manifest points to (nor the one on
+    #    disk now, in case another build published meanwhile). Temp files start with a dot.
+    keep = {MANIFEST_NAME}
+    for m in (manifest, previous, read_manifest()):
+        if m:
+            keep.add(m['full'])
+            keep.update(c['file'] for c in m['categories'].values())
+    for name in os.listdir(root):
+        if name.startswith('catalog') and name.removesuffix('.gz') not in keep:
+            os.remove(os.path.join(root, name))
+
+    logger.info('Catalog snapshot %s written (%d products).', manifest['version'], full.count)
+    return manifest
+
+
+def build_catalog_snapshot_safely():
+    """Import hook: a failed snapshot must never turn a successful import into a failed one."""
+    try:
+        build_catalog_snapshot()
+    except Exception:
+        logger.exception('Building the catalog snapshot failed.')
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone
+from django.db import connection
+from django.db.models import Max
+from .models import Product, ProductTombstone
+
+# --- Sync tokens (opaque, URL safe strings) ---
+# Postgres: 'v' + the xmin of a snapshot. Every transaction with a lower id had finished when
+# it was taken, and anything that commits later has an id >= xmin. So "changed since the token"
+# is change_xid >= xmin, which follows commit order: a long import that started before a quick
+# admin edit but commits after it is still picked up by the next sync. Rows near the token can
+# be sent twice, never zero times.
+# Other databases (SQLite in development, one writer at a time): microseconds since the Unix
+# epoch of the latest updated_at / deleted_at.
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+XID_PREFIX = 'v'
+# 'x' + xmin: tokens from before tombstones were kept per vendor (migration 0018)
+LEGACY_XID_PREFIX = 'x'
+
+
+def encode_token(moment):
+    return str((moment - EPOCH) // timedelta(microseconds=1))
+
+
+def decode_token(token):
+    # Raises ValueError / OverflowError for garbage tokens
+    return EPOCH + timedelta(microseconds=int(token))
+
+
+def latest_change():
+    """
+    Returns the timestamp of the most recent insert, update or delete in the catalog
+    (or None for an empty catalog that never had a product).
+    """
+    latest_update = Product.objects.aggregate(latest=Max('updated_at'))['latest']
+    latest_delete = ProductTombstone.objects.aggregate(latest=Max('deleted_at'))['latest']
+    return max([m for m in (latest_update, latest_delete) if m], default=None)
+
+
+def _current_xmin():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint;")
+        return cursor.fetchone()[0]
+
+
+def changes(since_token=None):
+    """
+    Returns (next_token, upserts, deletes): Product and ProductTombstone querysets with everything
+    changed after `since_token` (the whole catalog and no deletes without a token).
+    Raises ValueError / OverflowError for tokens that can't be parsed.
+    """
+    upserts = Product.objects.all()
+    deletes = ProductTombstone.objects.none()
+
+    if connection.vendor == 'postgresql':
+        # 1. Taken before reading: anything the queries below don't see commits with a higher id
+        next_token = f'{XID_PREFIX}{_current_xmin()}'
+        if since_token and since_token.startswith(XID_PREFIX):
+            since = int(since_token[len(XID_PREFIX):])
+            upserts = upserts.filter(change_xid__gte=since)
+            deletes = ProductTombstone.objects.filter(change_xid__gte=since)
+        elif since_token:
+            # Timestamp token from before tokens followed commit order, or an 'x' token from before
+            # deletes named the vendor: start over with a full sync
+            int(since_token.removeprefix(LEGACY_XID_PREFIX))
+        return next_token, upserts.order_by('change_xid', 'id'), deletes.order_by('change_xid', 'id')
+
+    # 2. Timestamps: freeze the upper bound up front, so rows written while we read go into the next sync
+    since = decode_token(since_token) if since_token else None
+    as_of = max([m for m in (latest_change(), since) if m], default=EPOCH)
+    upserts = upserts.filter(updated_at__lte=as_of)
+    if since:
+        upserts = upserts.filter(updated_at__gt=since)
+        deletes = ProductTombstone.objects.filter(deleted_at__gt=since, deleted_at__lte=as_of)
+    return encode_token(as_of), upserts.order_by('updated_at', 'id'), deletes.order_by('deleted_at', 'id')
+
+
+def has_changes(since_token):
+    """True if anything was inserted, updated or deleted after `since_token`."""
+    _, upserts, deletes = changes(since_token)
+    return upserts.exists() or deletes.exists()
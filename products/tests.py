@@ -1,3 +1,586 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import itertools
+import json
+from io import StringIO
+import os
+import shutil
+import tempfile
+from unittest import mock, skipUnless
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from . import autocomplete, snapshots
+from .autocomplete import PrefixIndex, normalize_text
+from . import classify as classify_module
+from .classify import classify, propose_pending_statuses
+from .dedup import find_duplicate_groups, normalize_name
+from .importing import sync_products
+from .models import Product, ProductTombstone
+from .partitions import ensure_vendor_partitions, partition_name
+from .snapshots import build_catalog_snapshot
 
-# Create your tests here.
+# --- Query regression harness for the products API ---
+# Every supported parameter combination is requested against a seeded database and must stay
+# under a fixed number of queries. On Postgres each query is also EXPLAINed with seq scans and
+# sorts disabled: if the plan still has a Seq Scan on products_product or a Sort node, no index
+# can serve that query, and vendor-filtered queries must stay within one vendor partition.
+# Plan shapes are kept in products/query_plans/ as reviewable baselines.
+# Re-record them with: UPDATE_QUERY_PLANS=1 python manage.py test products
+
+PLAN_BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'query_plans')
+
+# Filters the list API understands, with values that match the seeded data
+LIST_FILTERS = {
+    'vendor': 'Blinkit',
+    'category': 'fruits',
+    'status': 'vegan',
+    'collapse': '1',
+}
+# First page (no param), a later page, an out of range page and a garbage page
+PAGES = [None, '2', '999', 'abc']
+# Full rows vs a sparse fieldset, default vs maximum page size
+FIELDS = [None, 'name,image_url']
+PAGE_SIZES = [None, '100']
+
+MAX_QUERIES = {
+    'product_list_api': 2,  # COUNT(*) for the paginator + the page itself
+    'category_list_api': 1,
+}
+
+VENDORS = ['blinkit', 'swiggy', 'zepto']
+CATEGORIES = ['Fruits', 'Vegetables', 'Snacks', 'Dairy Alternatives', None]
+STATUSES = ['VEGAN', 'NON_VEGAN', 'PENDING', 'UNSURE']
+
+
+def product_list_cases():
+    """Yields (case name, query params) for every filter combination, page and shape variant."""
+    for r in range(len(LIST_FILTERS) + 1):
+        for keys in itertools.combinations(LIST_FILTERS, r):
+            for page, fields, page_size in itertools.product(PAGES, FIELDS, PAGE_SIZES):
+                params = {k: LIST_FILTERS[k] for k in keys}
+                for key, value in (('page', page), ('fields', fields), ('page_size', page_size)):
+                    if value:
+                        params[key] = value
+                name = '&'.join(f'{k}={v}' for k, v in params.items()) or 'default'
+                yield name, params
+
+
+def plan_shape(node, depth=0):
+    """Flattens an EXPLAIN (FORMAT JSON) node into indented lines, without costs or row counts."""
+    label = node['Node Type']
+    if 'Relation Name' in node:
+        label += f" on {node['Relation Name']}"
+    if 'Index Name' in node:
+        label += f" using {node['Index Name']}"
+    lines = ['  ' * depth + label]
+    for child in node.get('Plans', []):
+        lines += plan_shape(child, depth + 1)
+    return lines
+
+
+def is_products_table(relation):
+    # The table itself, or one of its vendor partitions (products_product_v_..., products_product_default)
+    return relation == 'products_product' or relation.startswith('products_product_')
+
+
+def plan_problems(node):
+    """Returns the reasons a plan is rejected (empty list if it's fine)."""
+    problems = []
+    if node['Node Type'] == 'Seq Scan' and is_products_table(node.get('Relation Name', '')):
+        problems.append(f"sequential scan on {node['Relation Name']}")
+    if node['Node Type'] in ('Sort', 'Incremental Sort'):
+        problems.append(f"unindexed sort ({', '.join(node.get('Sort Key', []))})")
+    for child in node.get('Plans', []):
+        problems += plan_problems(child)
+    return problems
+
+
+def product_partitions(node):
+    """Yields the products_product partitions a plan reads."""
+    if is_products_table(node.get('Relation Name', '')):
+        yield node['Relation Name']
+    for child in node.get('Plans', []):
+        yield from product_partitions(child)
+
+
+class ProductsApiQueryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # A few hundred rows spread over every vendor / category / status,
+        # with every third product grouped as a cross-vendor duplicate
+        # bulk_create skips save(), so vendor_key and the vendor partitions are set up here
+        ensure_vendor_partitions(VENDORS)
+        products = []
+        for i in range(240):
+            products.append(Product(
+                product_link=f'https://example.com/product/{i}',
+                name=f'Product {i:03d}',
+                vendor=VENDORS[i % len(VENDORS)],
+                vendor_key=Product.vendor_key_for(VENDORS[i % len(VENDORS)]),
+                category=CATEGORIES[i % len(CATEGORIES)],
+                vegan_status=STATUSES[i % len(STATUSES)],
+            ))
+        Product.objects.bulk_create(products)
+        ids = list(Product.objects.order_by('id').values_list('id', flat=True))
+        for i in range(0, len(ids) - 1, 3):
+            Product.objects.filter(id__in=ids[i:i + 2]).update(group_id=ids[i])
+
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE products_product;')
+
+    def run_cases(self, view_name, cases):
+        """Requests every case, checks the query budget and (on Postgres) the query plans."""
+        cases = list(cases)
+        plans = {}
+        for case, params in cases:
+            with self.subTest(view=view_name, case=case):
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(reverse(view_name), params)
+                self.assertEqual(response.status_code, 200)
+
+                queries = [q['sql'] for q in ctx.captured_queries if q['sql'].lstrip().upper().startswith('SELECT')]
+                self.assertLessEqual(
+                    len(queries), MAX_QUERIES[view_name],
+                    f'{view_name}?{case} ran {len(queries)} queries:\n' + '\n'.join(queries),
+                )
+
+                if connection.vendor == 'postgresql':
+                    plans[case] = self.explain(view_name, case, queries, single_partition='vendor' in params)
+
+        # Only compare / record baselines when every case produced an acceptable plan
+        if connection.vendor == 'postgresql' and len(plans) == len(cases):
+            self.check_baseline(view_name, plans)
+
+    def explain(self, view_name, case, queries, single_partition=False):
+        shapes = []
+        with connection.cursor() as cursor:
+            # With these off, the planner only falls back to a seq scan / sort if no index can do it
+            cursor.execute('SET enable_seqscan = off; SET enable_sort = off;')
+            try:
+                for sql in queries:
+                    cursor.execute('EXPLAIN (FORMAT JSON) ' + sql)
+                    plan = cursor.fetchone()[0][0]['Plan']
+                    problems = plan_problems(plan)
+                    partitions = set(product_partitions(plan))
+                    if single_partition and len(partitions) > 1:
+                        problems.append(f"scans {len(partitions)} partitions ({', '.join(sorted(partitions))})")
+                    self.assertFalse(
+                        problems,
+                        f'{view_name}?{case}: {", ".join(problems)}\n{sql}\n' + '\n'.join(plan_shape(plan)),
+                    )
+                    shapes.append(plan_shape(plan))
+            finally:
+                cursor.execute('RESET enable_seqscan; RESET enable_sort;')
+        return shapes
+
+    def check_baseline(self, view_name, plans):
+        path = os.path.join(PLAN_BASELINE_DIR, f'{view_name}.json')
+        if os.environ.get('UPDATE_QUERY_PLANS') or not os.path.exists(path):
+            os.makedirs(PLAN_BASELINE_DIR, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(plans, f, indent=2, sort_keys=True)
+                f.write('\n')
+            return
+
+        with open(path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        changed = sorted(case for case in plans if baseline.get(case) != plans[case])
+        self.assertFalse(
+            changed,
+            f'Query plans of {view_name} changed for: {", ".join(changed)}. '
+            'Review them and re-record with UPDATE_QUERY_PLANS=1.',
+        )
+
+    def test_product_list_api(self):
+        self.run_cases('product_list_api', product_list_cases())
+
+    def test_product_list_api_fields_and_page_size(self):
+        response = self.client.get(reverse('product_list_api'), {'fields': 'image_url,name', 'page_size': '1000'})
+        self.assertEqual(len(response.json()['results']), 100)
+        self.assertEqual(list(response.json()['results'][0]), ['name', 'image_url'])
+
+        response = self.client.get(reverse('product_list_api'), {'fields': 'name,password'})
+        self.assertEqual(response.status_code, 400)
+
+        # Separators only must not turn into "all columns"
+        for fields in (',', ' , '):
+            response = self.client.get(reverse('product_list_api'), {'fields': fields})
+            self.assertEqual(response.status_code, 400)
+
+    def test_category_list_api(self):
+        self.run_cases('category_list_api', [('default', {})])
+
+
+class VeganClassifierTests(SimpleTestCase):
+
+    def test_classify(self):
+        cases = {
+            ('Chicken Curry Cut', 'Meat'): 'NON_VEGAN',
+            ('Amul Pure Ghee', None): 'NON_VEGAN',
+            ('Onion Pyaz', 'Fresh Vegetables'): 'VEGAN',
+            # Longer phrases win over the words inside them
+            ('Almond Milk Unsweetened', None): 'VEGAN',
+            # Label claims win over the ingredient words they qualify
+            ('Dairy Free Cheese Slices', None): 'VEGAN',
+            ('Coconut Milk Powder', None): 'VEGAN',
+            ('Lactose Free Milk', None): 'NON_VEGAN',
+            ('Paneer Tikka', 'Vegetables'): 'NON_VEGAN',
+            ('Tomato Mayonnaise', None): 'UNSURE',
+            ('Graham Crackers', None): None,
+            ('Eggless Cake', None): 'VEGAN',
+            ('Xyz 500g', None): None,
+        }
+        for (name, category), expected in cases.items():
+            with self.subTest(name=name):
+                result = classify(name, category)
+                self.assertEqual(result and result[0], expected)
+                if result:
+                    self.assertTrue(0 < result[1] <= 1)
+
+
+class ProductChangesApiTests(TransactionTestCase):
+    # Not wrapped in one big transaction: on Postgres sync tokens follow transaction ids
+
+    def sync(self, since=None):
+        response = self.client.get(reverse('product_changes_api'), {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(b''.join(response.streaming_content))
+
+    def create(self, n, vendor='blinkit'):
+        return Product.objects.create(product_link=f'https://example.com/p/{n}', name=f'Product {n}', vendor=vendor)
+
+    def test_token_round_trip(self):
+        kept, edited, removed = self.create(1), self.create(2), self.create(3)
+        first = self.sync()
+        self.assertEqual({p['product_link'] for p in first['upserts']}, {kept.product_link, edited.product_link, removed.product_link})
+        self.assertEqual(first['deletes'], [])
+
+        edited.name = 'Product 2 (new)'
+        edited.save()
+        removed.delete()
+        added = self.create(4)
+
+        second = self.sync(first['next_token'])
+        self.assertEqual([p['product_link'] for p in second['upserts']], [edited.product_link, added.product_link])
+        self.assertEqual(second['upserts'][0]['name'], 'Product 2 (new)')
+        self.assertEqual(second['deletes'], [{'vendor_key': 'blinkit', 'product_link': removed.product_link}])
+
+        # Nothing changed since: nothing to send
+        third = self.sync(second['next_token'])
+        self.assertEqual((third['upserts'], third['deletes']), ([], []))
+
+    def test_deleting_a_link_another_vendor_sells(self):
+        self.create(1, vendor='Blinkit')
+        self.create(1, vendor='Swiggy')
+        first = self.sync()
+        self.assertEqual({(p['vendor_key'], p['product_link']) for p in first['upserts']},
+                         {('blinkit', 'https://example.com/p/1'), ('swiggy', 'https://example.com/p/1')})
+
+        # Only Blinkit's copy is gone, Swiggy's stays in the catalog
+        Product.objects.get(vendor='Blinkit').delete()
+        self.assertEqual(self.sync(first['next_token'])['deletes'], [{'vendor_key': 'blinkit', 'product_link': 'https://example.com/p/1'}])
+        self.assertEqual([p['vendor_key'] for p in self.sync()['upserts']], ['swiggy'])
+
+        # Blinkit lists it again
+        self.create(1, vendor='Blinkit')
+        self.assertFalse(ProductTombstone.objects.exists())
+
+    def test_invalid_token(self):
+        response = self.client.get(reverse('product_changes_api'), {'since': 'not-a-token'})
+        self.assertEqual(response.status_code, 400)
+
+    @skipUnless(connection.vendor == 'postgresql', 'xid tokens are Postgres only')
+    def test_token_from_before_vendor_deletes(self):
+        # Deletes used to be bare links: clients holding an old token start over
+        self.create(1)
+        ProductTombstone.objects.create(vendor_key='blinkit', product_link='https://example.com/p/2')
+        legacy = self.sync('x1')
+        self.assertEqual((len(legacy['upserts']), legacy['deletes']), (1, []))
+        self.assertTrue(legacy['next_token'].startswith('v'))
+
+    @skipUnless(connection.vendor == 'postgresql', 'sync tokens only follow commit order on Postgres')
+    def test_long_transaction_committing_late(self):
+        slow, quick = self.create(1), self.create(2)
+        token = self.sync()['next_token']
+
+        # An import-like transaction starts first, a quick edit commits while it's still open
+        other = connection.copy()
+        try:
+            other.set_autocommit(False)
+            with other.cursor() as cursor:
+                cursor.execute("UPDATE products_product SET name = 'Slow', updated_at = now() WHERE id = %s;", [slow.id])
+            quick.name = 'Quick'
+            quick.save()
+
+            during = self.sync(token)
+            self.assertEqual([p['name'] for p in during['upserts']], ['Quick'])
+            other.commit()
+        finally:
+            other.close()
+
+        after = self.sync(during['next_token'])
+        self.assertIn('Slow', [p['name'] for p in after['upserts']])
+
+
+class SnapshotMiddlewareTests(SimpleTestCase):
+
+    def setUp(self):
+        self.static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.static_root)
+
+    def test_deleted_snapshot_file_is_a_404(self):
+        snapshot_root = os.path.join(self.static_root, 'catalog')
+        with override_settings(STATIC_ROOT=self.static_root, CATALOG_SNAPSHOT_ROOT=snapshot_root):
+            # Written after startup, like an import would
+            os.makedirs(snapshot_root)
+            path = os.path.join(snapshot_root, 'catalog.0123456789ab.ndjson')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('{}\n')
+
+            url = '/static/catalog/catalog.0123456789ab.ndjson'
+            self.assertEqual(self.client.get(url).status_code, 200)
+            # Cleaned up by a later snapshot
+            os.remove(path)
+            self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class CatalogSnapshotTests(TestCase):
+
+    def setUp(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        self.root = os.path.join(static_root, 'catalog')
+        settings_override = override_settings(STATIC_ROOT=static_root, CATALOG_SNAPSHOT_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        for n, category in enumerate(['Fruits', 'Fruits', 'Snacks', None]):
+            Product.objects.create(product_link=f'https://example.com/p/{n}', name=f'Product {n}', vendor='Blinkit', category=category)
+
+    def read(self, name):
+        with open(os.path.join(self.root, name), 'rb') as f:
+            content = f.read()
+        # Named after its content, with an identical .gz sibling
+        self.assertIn(f'.{hashlib.sha256(content).hexdigest()[:12]}.', name)
+        with gzip.open(os.path.join(self.root, name + '.gz')) as f:
+            self.assertEqual(f.read(), content)
+        return [json.loads(line) for line in content.splitlines()]
+
+    def files(self, manifest):
+        return {manifest['full']} | {c['file'] for c in manifest['categories'].values()}
+
+    def test_build(self):
+        manifest = build_catalog_snapshot()
+        self.assertEqual(len(self.read(manifest['full'])), manifest['count'])
+        self.assertEqual(manifest['count'], 4)
+        self.assertEqual({name: c['count'] for name, c in manifest['categories'].items()}, {'Fruits': 2, 'Snacks': 1})
+        fruits = self.read(manifest['categories']['Fruits']['file'])
+        self.assertEqual([(p['name'], p['vendor_key']) for p in fruits], [('Product 0', 'blinkit'), ('Product 1', 'blinkit')])
+        self.assertFalse([name for name in os.listdir(self.root) if name.startswith('.')])
+
+        response = self.client.get(reverse('catalog_snapshot_api'))
+        self.assertEqual(response.json()['count'], 4)
+        full_url = response.json()['full']
+        self.assertTrue(full_url.endswith(f"/static/catalog/{manifest['full']}"))
+        self.assertEqual(self.client.get(full_url).status_code, 200)
+
+    def test_old_files_are_removed_two_builds_later(self):
+        builds = []
+        for name in ('First', 'Second', 'Third'):
+            Product.objects.update(name=name)
+            builds.append(build_catalog_snapshot())
+        first, second, third = (self.files(m) for m in builds)
+        self.assertFalse(first & (second | third))
+
+        on_disk = set(os.listdir(self.root))
+        self.assertEqual(on_disk, {'manifest.json'} | second | third | {f'{name}.gz' for name in second | third})
+
+    def test_failed_build_leaves_no_temp_files(self):
+        manifest = build_catalog_snapshot()
+        with mock.patch.object(snapshots, 'slugify', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                build_catalog_snapshot()
+        self.assertFalse([name for name in os.listdir(self.root) if name.startswith('.')])
+        self.assertEqual(snapshots.read_manifest(), manifest)
+
+
+class DuplicateGroupTests(SimpleTestCase):
+
+    def test_normalize_name(self):
+        self.assertEqual(normalize_name('Onion (Eerulli) 500 g'), ('onion',))
+        self.assertEqual(normalize_name('Onion Pyaz'), ('onion',))
+        self.assertEqual(normalize_name('Hybrid Tomato Tamatar'), ('hybrid', 'tomato'))
+        self.assertEqual(normalize_name('N/A'), ())
+
+    def grouped(self, rows):
+        groups = find_duplicate_groups(rows)
+        return {frozenset(i for i in groups if groups[i] == g) for g in set(groups.values())}
+
+    def test_same_product_across_vendors(self):
+        rows = [
+            (1, 'Onion Pyaz', 'blinkit'), (2, 'Onion (Eerulli)', 'swiggy'),
+            (3, 'Hybrid Tomato Tamatar', 'blinkit'), (4, 'Hybrid Tomato', 'swiggy'),
+            (5, 'Potato Aloo', 'blinkit'), (6, 'Potato (Aloo Gadde)', 'swiggy'),
+        ]
+        self.assertEqual(self.grouped(rows), {frozenset({1, 2}), frozenset({3, 4}), frozenset({5, 6})})
+
+    def test_near_misses(self):
+        rows = [
+            # One shared word: different products
+            (1, 'Tomato Ketchup', 'swiggy'), (2, 'Tomato (Tamatar)', 'blinkit'), (3, 'Tomato Puree', 'zepto'),
+            (4, 'Baby Potato Aloo', 'blinkit'), (5, 'Potato (Aloo Gadde)', 'swiggy'),
+            # A combo pack isn't one of its items
+            (6, 'Onion, Potato & Hybrid Tomato', 'swiggy'), (7, 'Hybrid Tomato Tamatar', 'blinkit'),
+            # Same vendor listings are variants
+            (8, 'Carrot', 'swiggy'), (9, 'Carrot', 'swiggy'),
+        ]
+        self.assertEqual(self.grouped(rows), set())
+
+
+class ProfilingTests(TestCase):
+
+    def test_only_profile_1_profiles(self):
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        url = reverse('category_list_api')
+        self.assertEqual(self.client.get(url, {'_profile': '0'}).json(), [])
+        self.assertEqual(self.client.get(url, {'_profile': ''}).json(), [])
+        self.assertIn('timings_ms', self.client.get(url, {'_profile': '1'}).json())
+
+    def test_streamed_rows_count_as_db_time(self):
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        Product.objects.bulk_create(
+            Product(product_link=f'https://example.com/p/{i}', name=f'Product {i}') for i in range(500)
+        )
+        report = self.client.get(reverse('product_changes_api'), {'_profile': '1'}).json()
+
+        # The rows come from .iterator() after execute() returned
+        upserts = next(q for q in report['queries'] if 'ORDER BY' in q['sql'] and 'products_product"' in q['sql'])
+        self.assertGreater(upserts['fetch_ms'], 0)
+        timings = report['timings_ms']
+        self.assertGreater(timings['db_fetch'], 0)
+        self.assertAlmostEqual(timings['db'], sum(q['ms'] for q in report['queries']), delta=0.01)
+
+
+class PrefixIndexTests(SimpleTestCase):
+
+    def texts(self, index, query, limit=10):
+        return [r['text'] for r in index.search(query, limit=limit)]
+
+    def test_short_prefixes_next_to_one_letter_words(self):
+        # Single letter keys ('g', 'a') used to swallow the two letter prefixes after them
+        index = PrefixIndex([
+            ('Amul Butter 500 g', 'product', 1), ('French Beans 250 G', 'product', 1),
+            ('N/A', 'product', 1), ('Green Peas', 'product', 1), ('Garlic', 'product', 1),
+            ('Apple', 'product', 1),
+        ])
+        self.assertEqual(self.texts(index, 'gr'), ['Green Peas'])
+        self.assertEqual(self.texts(index, 'ga'), ['Garlic'])
+        self.assertEqual(self.texts(index, 'ap'), ['Apple'])
+        self.assertEqual(self.texts(index, 'gre'), ['Green Peas'])
+        self.assertIn('Amul Butter 500 g', self.texts(index, 'g'))
+
+    def test_ranking(self):
+        index = PrefixIndex([
+            ('Onion Pyaz', 'product', 1), ('Onion', 'product', 1), ('Spring Onion', 'product', 1),
+            ('Onion Rings', 'product', 5), ('Crème Brûlée', 'product', 1),
+        ])
+        # Exact match, then names starting with the query (more popular first), then later words
+        self.assertEqual(self.texts(index, 'onion'), ['Onion', 'Onion Rings', 'Onion Pyaz', 'Spring Onion'])
+        self.assertEqual(self.texts(index, 'pyaz'), ['Onion Pyaz'])
+        self.assertEqual(self.texts(index, 'creme'), ['Crème Brûlée'])
+        self.assertEqual(self.texts(index, 'onion', limit=1), ['Onion'])
+        self.assertEqual(index.search(''), [])
+        self.assertEqual(normalize_text('Crème Brûlée (Large)'), 'creme brulee large')
+
+    def test_short_prefix_ranks_the_whole_run(self):
+        # The popular suggestion sorts last alphabetically, far beyond MAX_SCAN
+        with mock.patch.object(autocomplete, 'MAX_SCAN', 2):
+            index = PrefixIndex([(f'Onia {i:02d}', 'product', 1) for i in range(20)] + [('Onib', 'product', 50)])
+            self.assertEqual(self.texts(index, 'on', limit=1), ['Onib'])
+            self.assertEqual(self.texts(index, 'oni', limit=1), ['Onib'])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'imports use COPY')
+class SyncProductsTests(TransactionTestCase):
+
+    def setUp(self):
+        snapshot_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, snapshot_root)
+        settings_override = override_settings(CATALOG_SNAPSHOT_ROOT=snapshot_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def sync(self, rows, **kwargs):
+        # rows: (product_link, name, vendor), in IMPORT_COLUMNS order for COPY
+        buffer = StringIO(''.join(f'{link}\t{name}\t\tVEGAN\t{vendor}\t\n' for link, name, vendor in rows))
+        return sync_products(buffer, **kwargs)
+
+    def tombstones(self):
+        return set(ProductTombstone.objects.values_list('vendor_key', 'product_link'))
+
+    def test_link_sold_by_two_vendors(self):
+        self.sync([('https://x/1', 'Onion', 'Blinkit'), ('https://x/1', 'Onion', 'Swiggy'), ('https://x/2', 'Kale', 'Swiggy')])
+        # New vendors got their partition before the import's own transaction
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT relname FROM pg_class WHERE relname IN %s;", [(partition_name('blinkit'), partition_name('swiggy'))])
+            self.assertEqual(len(cursor.fetchall()), 2)
+
+        # Swiggy drops it, Blinkit still sells it: only Swiggy's copy is gone
+        self.assertEqual(self.sync([('https://x/2', 'Kale', 'Swiggy')], vendor='Swiggy'), (0, 1))
+        self.assertEqual(self.tombstones(), {('swiggy', 'https://x/1')})
+
+        # Swiggy lists it again, then both drop it in one full replace
+        self.sync([('https://x/1', 'Onion', 'Swiggy'), ('https://x/2', 'Kale', 'Swiggy')], vendor='Swiggy')
+        self.assertEqual(self.tombstones(), set())
+        self.assertEqual(self.sync([('https://x/2', 'Kale', 'Swiggy')]), (0, 2))
+        self.assertEqual(self.tombstones(), {('blinkit', 'https://x/1'), ('swiggy', 'https://x/1')})
+
+    def test_pending_feed_keeps_reviewer_decisions(self):
+        self.sync([('https://x/1', 'Onion', 'Blinkit'), ('https://x/2', 'Kale', 'Blinkit')])
+        Product.objects.filter(product_link='https://x/1').update(vegan_status='NON_VEGAN')
+        updated_at = Product.objects.get(product_link='https://x/1').updated_at
+
+        buffer = StringIO('https://x/1\tOnion\t\tPENDING\tBlinkit\t\nhttps://x/2\tKale\t\tNON_VEGAN\tBlinkit\t\n')
+        self.assertEqual(sync_products(buffer), (1, 0))
+        onion = Product.objects.get(product_link='https://x/1')
+        self.assertEqual((onion.vegan_status, onion.updated_at), ('NON_VEGAN', updated_at))
+        # A status the feed does know still wins
+        self.assertEqual(Product.objects.get(product_link='https://x/2').vegan_status, 'NON_VEGAN')
+
+
+@skipUnless(connection.vendor == 'postgresql', 'proposals are written with COPY')
+class ProposePendingStatusesTests(TransactionTestCase):
+
+    def create(self, name, **kwargs):
+        return Product.objects.create(product_link=f'https://example.com/{name}', name=name, **kwargs)
+
+    def test_proposals(self):
+        chicken, onion, almond = self.create('Chicken Curry Cut'), self.create('Onion Pyaz'), self.create('Almond Milk')
+        decided = self.create('Paneer Tikka', vegan_status='NON_VEGAN')
+        renamed = self.create('Xyz 500g')
+        Product.objects.filter(id__in=[decided.id, renamed.id]).update(proposed_status='VEGAN', proposed_confidence=0.6)
+
+        def reviewer_is_faster(name, category=None):
+            # A reviewer decides Almond Milk between the classifier's read and its write
+            if name == 'Almond Milk':
+                Product.objects.filter(id=almond.id).update(vegan_status='UNSURE')
+            return classify(name, category)
+
+        with mock.patch.object(classify_module, 'classify', side_effect=reviewer_is_faster):
+            self.assertEqual(propose_pending_statuses(), 4)
+
+        rows = {p.name: (p.vegan_status, p.proposed_status, p.proposed_confidence) for p in Product.objects.all()}
+        self.assertEqual(rows, {
+            chicken.name: ('PENDING', 'NON_VEGAN', 0.95),
+            onion.name: ('PENDING', 'VEGAN', 0.6),
+            almond.name: ('UNSURE', None, None),
+            decided.name: ('NON_VEGAN', None, None),
+            renamed.name: ('PENDING', None, None),
+        })
+        # Nothing left to do
+        self.assertEqual(propose_pending_statuses(), 0)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import product_list_api, category_list_api # Import the new view
+from .views import product_list_api, category_list_api, product_changes_api, catalog_snapshot_api, autocomplete_api
 
 # This list defines the URL patterns for the 'products' app.
 urlpatterns = [
@@ -10,4 +10,13 @@ urlpatterns = [
     
     # The new API just for the sidebar categories
     path('categories/', category_list_api, name='category_list_api'),
+
+    # Delta sync: only the products changed since ?since=<token>
+    path('changes/', product_changes_api, name='product_changes_api'),
+
+    # Points to the current prebuilt catalog snapshot files (one download cold start)
+    path('snapshot/', catalog_snapshot_api, name='catalog_snapshot_api'),
+
+    # Search box suggestions (?q=oni)
+    path('autocomplete/', autocomplete_api, name='autocomplete_api'),
 ]
\ No newline at end of file
@@ -1,7 +1,21 @@
-from django.http import JsonResponse
-from .models import Product
+import json
+import os
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Exists, OuterRef
+from django.http import JsonResponse, StreamingHttpResponse
+from .autocomplete import MAX_LIMIT, get_index
+from .models import PRODUCT_FIELDS, Product
+from .profiling import profile_if_requested
+from .snapshots import read_manifest
+from .sync import changes
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
+# Page size limits for ?page_size= on the list API
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+@profile_if_requested
 def category_list_api(request):
     """
     New Endpoint: Returns a list of all unique categories.
@@ -14,10 +28,28 @@ def category_list_api(request):
     
     return JsonResponse(valid_categories, safe=False)
 
+@profile_if_requested
 def product_list_api(request):
     """
     Main Endpoint: Returns products with SERVER-SIDE Filtering and Pagination.
+    Optional: `?fields=name,image_url` picks the returned fields (from PRODUCT_FIELDS)
+    and `?page_size=50` the page size (up to MAX_PAGE_SIZE).
     """
+    # 0. Sparse fieldsets: validate against the allow-list, keep PRODUCT_FIELDS order
+    # so equivalent requests select (and return) exactly the same columns
+    fields = PRODUCT_FIELDS
+    if request.GET.get('fields'):
+        requested = {f.strip() for f in request.GET['fields'].split(',') if f.strip()}
+        unknown = requested - set(PRODUCT_FIELDS)
+        if not requested:
+            # e.g. `?fields=,` would otherwise mean .values() with no fields, i.e. every column
+            return JsonResponse({'error': f"No fields given. Allowed: {', '.join(PRODUCT_FIELDS)}."}, status=400)
+        if unknown:
+            return JsonResponse({
+                'error': f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(PRODUCT_FIELDS)}."
+            }, status=400)
+        fields = tuple(f for f in PRODUCT_FIELDS if f in requested)
+
     # 1. Start with all products, ordered by name (essential for pagination stability)
     products_queryset = Product.objects.all().order_by('name', 'id')
 
@@ -27,8 +59,8 @@ def product_list_api(request):
     status = request.GET.get('status')  # New filter for vegan_status
 
     if vendor:
-        # Case-insensitive match
-        products_queryset = products_queryset.filter(vendor__iexact=vendor)
+        # Case-insensitive match on the partition key, so Postgres only reads that vendor's partition
+        products_queryset = products_queryset.filter(vendor_key=Product.vendor_key_for(vendor))
     
     if category:
         # Case-insensitive match
@@ -37,21 +69,24 @@ def product_list_api(request):
     if status: 
         products_queryset = products_queryset.filter(vegan_status__iexact=status)
 
+    # Optional: show each cross-vendor duplicate group once (?collapse=1)
+    if request.GET.get('collapse') in ('1', 'true', 'yes'):
+        # Drop a product if a lower-id product of the same group also matches the filters
+        products_queryset = products_queryset.exclude(Exists(
+            products_queryset.filter(group_id=OuterRef('group_id'), id__lt=OuterRef('id'))
+        ))
+
     # 3. Select only the fields we need (Optimization)
-    data = products_queryset.values(
-        'name', 
-        'product_link', 
-        # 'description',
-        'image_url', 
-        'price',
-        'vendor',
-        'vegan_status',
-        'category'
-    )
+    # A narrow projection (e.g. just `name`) can be answered from the (name, id) index alone
+    data = products_queryset.values(*fields)
 
     # 4. Pagination Logic
     page_number = request.GET.get('page', 1)
-    per_page = 20 # Load 20 items at a time
+    try:
+        # Bounded, so one request can never pull the whole table
+        per_page = min(max(int(request.GET.get('page_size', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        per_page = DEFAULT_PAGE_SIZE
     
     paginator = Paginator(data, per_page)
 
@@ -75,4 +110,82 @@ def product_list_api(request):
         'has_next': products_page.has_next(),
         'total_pages': paginator.num_pages,
         'current_page': products_page.number
-    })
\ No newline at end of file
+    })
+
+@profile_if_requested
+def product_changes_api(request):
+    """
+    Delta Sync Endpoint: Returns only the products inserted, updated or deleted since `?since=<token>`.
+    Without a token it returns the full catalog. Every response carries a `next_token`
+    for the client to send on its next sync. A product can show up in two consecutive
+    syncs (applying it twice is harmless), a change is never skipped.
+    Products are identified by (vendor_key, product_link): several vendors can sell the same link.
+    """
+    # 1. Read the client's token and build the two change lists (range scans on an indexed column, see sync.py)
+    try:
+        next_token, upserts, deletes = changes(request.GET.get('since'))
+    except (ValueError, OverflowError):
+        return JsonResponse({'error': 'Invalid since token.'}, status=400)
+
+    upserts = upserts.values(*PRODUCT_FIELDS)
+    deletes = deletes.values('vendor_key', 'product_link')
+
+    # 2. Stream the JSON so large syncs never sit in memory as one big list
+    def stream():
+        yield '{"next_token": %s, "upserts": [' % json.dumps(next_token)
+        for i, row in enumerate(upserts.iterator(chunk_size=2000)):
+            yield (',' if i else '') + json.dumps(row, cls=DjangoJSONEncoder)
+        yield '], "deletes": ['
+        for i, key in enumerate(deletes.iterator(chunk_size=2000)):
+            yield (',' if i else '') + json.dumps(key)
+        yield ']}'
+
+    return StreamingHttpResponse(stream(), content_type='application/json')
+
+@profile_if_requested
+def catalog_snapshot_api(request):
+    """
+    Snapshot Manifest: Points clients at the current prebuilt catalog files.
+    Clients bootstrap by downloading `full` (or a category file) once, then keep up
+    with /changes/?since=<sync_token>.
+    """
+    manifest = read_manifest()
+    if manifest is None:
+        return JsonResponse({'error': 'No catalog snapshot has been built yet.'}, status=404)
+
+    # Turn file names into full URLs served by WhiteNoise
+    snapshot_dir = os.path.relpath(settings.CATALOG_SNAPSHOT_ROOT, settings.STATIC_ROOT).replace(os.sep, '/')
+    def url(name):
+        return request.build_absolute_uri(f'{settings.STATIC_URL}{snapshot_dir}/{name}')
+
+    response = JsonResponse({
+        'version': manifest['version'],
+        'generated_at': manifest['generated_at'],
+        'sync_token': manifest['sync_token'],
+        'count': manifest['count'],
+        'full': url(manifest['full']),
+        'categories': {
+            name: {'url': url(c['file']), 'count': c['count']}
+            for name, c in manifest['categories'].items()
+        },
+    })
+    # The manifest itself changes with every import, so only cache it briefly
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
+
+@profile_if_requested
+def autocomplete_api(request):
+    """
+    Typeahead Endpoint: `?q=oni&limit=10` returns matching product names, vendors and categories.
+    Served from an in-memory prefix index (see autocomplete.py), no database query per keystroke.
+    """
+    query = request.GET.get('q', '')
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = 10
+
+    return JsonResponse({
+        'query': query,
+        'results': get_index().search(query, limit=limit),
+    })